@@ -4,15 +4,15 @@ from __future__ import annotations
 
 import argparse
 import logging
+import signal
 import sys
-import time
-import webbrowser
-from .auth import AuthorizationFlow
+from typing import TYPE_CHECKING
+
 from .config import OAuthConfig, get_client_id
 from .credentials import CredentialRecord, CredentialStore
-from .history import HistoryStore
-from .scheduler import DailyScheduler
-from .signin import SignInClient
+
+if TYPE_CHECKING:  # pragma: no cover - imported lazily by the commands
+    from .auth import AuthorizationFlow
 
 LOGGER = logging.getLogger("anyrouter_auto")
 
@@ -50,6 +50,10 @@ def _load_store(passphrase: str | None) -> CredentialStore:
 
 
 def cmd_authorize(args: argparse.Namespace) -> None:
+    import webbrowser
+
+    from .auth import AuthorizationFlow
+
     client_id = args.client_id or get_client_id()
     if not client_id:
         try:
@@ -97,6 +101,10 @@ def _ensure_credentials(
 
 
 def cmd_signin(args: argparse.Namespace) -> None:
+    from .auth import AuthorizationFlow
+    from .history import HistoryStore
+    from .signin import SignInClient
+
     store = _load_store(args.passphrase)
     try:
         record = store.load()
@@ -115,13 +123,15 @@ def cmd_signin(args: argparse.Namespace) -> None:
         sys.exit(1)
     flow = AuthorizationFlow(OAuthConfig(client_id=client_id), store)
     record = _ensure_credentials(store, flow, record)
-    client = SignInClient()
+    client = SignInClient(session=flow.session)
     result = client.perform_sign_in(record)
     HistoryStore().append(result)
     print(SignInClient.format_result(result))
 
 
 def cmd_status(args: argparse.Namespace) -> None:
+    from .history import HistoryStore
+
     store = _load_store(args.passphrase)
     record = store.load()
     if not record:
@@ -133,13 +143,19 @@ def cmd_status(args: argparse.Namespace) -> None:
             print(f"Expires at: {record.expires_at}")
         if record.client_id:
             print(f"Stored GitHub client id: {record.client_id}")
-    history = HistoryStore().load()
+    history = HistoryStore().load_tail(args.limit)
     print("Recent history:")
-    for item in history[-args.limit :]:
+    for item in history:
         print(f"- {item.summary()}")
 
 
 def cmd_schedule(args: argparse.Namespace) -> None:
+    from .auth import AuthorizationFlow, TokenRefresher
+    from .history import HistoryStore
+    from .scheduler import DailyScheduler
+    from .signin import SignInClient
+    from .transport import HTTPSession
+
     store = _load_store(args.passphrase)
     record = store.load()
     if record is None:
@@ -153,21 +169,29 @@ def cmd_schedule(args: argparse.Namespace) -> None:
         )
         sys.exit(1)
     flow = AuthorizationFlow(OAuthConfig(client_id=client_id), store)
+    refresher = TokenRefresher(flow, store, record)
+    # The scheduler aborts this session on stop(); keep the token refresh,
+    # whose reply may carry a rotated refresh token, off it.
+    session = HTTPSession()
+    client = SignInClient(session=session)
+    history = HistoryStore()
 
     def job() -> None:
         record = _ensure_credentials(store, flow)
-        client = SignInClient()
         result = client.perform_sign_in(record)
-        HistoryStore().append(result)
+        history.append(result)
         LOGGER.info("%s", SignInClient.format_result(result))
 
-    scheduler = DailyScheduler(job)
-    scheduler.start()
+    scheduler = DailyScheduler(job, session=session)
+    # SIGTERM takes the same path as Ctrl+C so service managers stop cleanly.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    refresher.start()
     try:
-        while True:
-            time.sleep(1)
+        scheduler.run_forever()
     except KeyboardInterrupt:
         print("Stopping scheduler...")
+    finally:
+        refresher.stop()
         scheduler.stop()
 
 
@@ -2,22 +2,28 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import secrets
 import threading
 import time
 import urllib.parse
-import urllib.request
 from dataclasses import dataclass
 from http import HTTPStatus
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from .config import OAuthConfig
 from .credentials import CredentialRecord, CredentialStore
+from .transport import HTTPError, HTTPSession, default_session
 
 AUTHORIZATION_ENDPOINT = "https://anyrouter.top/api/oauth/authorize"
 TOKEN_ENDPOINT = "https://anyrouter.top/api/oauth/token"
+CALLBACK_READ_TIMEOUT = 10.0
+REFRESH_MARGIN_SECONDS = 300.0
+REFRESH_CHECK_INTERVAL = 60.0
+REFRESH_MAX_BACKOFF = 3600.0
+LOGGER = logging.getLogger(__name__)
 
 
 @dataclass(slots=True)
@@ -27,45 +33,74 @@ class AuthorizationResult:
     received_at: float
 
 
-class CallbackHandler(BaseHTTPRequestHandler):
-    """HTTP handler capturing OAuth redirect parameters."""
+def _resolve_callback(
+    method: str, target: str, expected_state: Optional[str]
+) -> Tuple[HTTPStatus, str, Optional[AuthorizationResult]]:
+    """Map one redirect request to a response and, if valid, its result."""
 
-    result: Optional[AuthorizationResult] = None
-    expected_state: Optional[str] = None
-    event: Optional[threading.Event] = None
+    if method != "GET":
+        return HTTPStatus.METHOD_NOT_ALLOWED, "Unsupported method", None
+    parsed = urllib.parse.urlparse(target)
+    if parsed.path != "/callback":
+        return HTTPStatus.NOT_FOUND, "Unknown path", None
+    params = dict(urllib.parse.parse_qsl(parsed.query))
+    code = params.get("code")
+    state = params.get("state")
+    if not code or not state:
+        return HTTPStatus.BAD_REQUEST, "Missing query parameters", None
+    if expected_state and state != expected_state:
+        return HTTPStatus.UNAUTHORIZED, "State mismatch", None
+    result = AuthorizationResult(code=code, state=state, received_at=time.time())
+    return HTTPStatus.OK, "Authorization complete. You may close this window.", result
 
-    def do_GET(self) -> None:  # noqa: N802 (BaseHTTPRequestHandler API)
-        parsed = urllib.parse.urlparse(self.path)
-        if parsed.path != "/callback":
-            self.send_error(HTTPStatus.NOT_FOUND, "Unknown path")
-            return
-        params = urllib.parse.parse_qs(parsed.query)
-        code = params.get("code", [None])[0]
-        state = params.get("state", [None])[0]
-        if not code or not state:
-            self.send_error(HTTPStatus.BAD_REQUEST, "Missing query parameters")
-            return
-        if self.expected_state and state != self.expected_state:
-            self.send_error(HTTPStatus.UNAUTHORIZED, "State mismatch")
-            return
-        self.result = AuthorizationResult(code=code, state=state, received_at=time.time())
-        if self.event:
-            self.event.set()
-        self.send_response(HTTPStatus.OK)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(b"<html><body>Authorization complete. You may close this window.</body></html>")
 
-    def log_message(self, format: str, *args) -> None:  # noqa: A003 - matching signature
-        return
+async def _read_request_line(reader: asyncio.StreamReader) -> Tuple[str, str]:
+    request_line = await reader.readline()
+    # Drain the headers; the redirect carries everything in the query string.
+    while (await reader.readline()).strip():
+        pass
+    parts = request_line.decode("latin-1").split()
+    if len(parts) < 2:
+        return "", ""
+    return parts[0], parts[1]
+
+
+def _render_response(status: HTTPStatus, message: str) -> bytes:
+    body = f"<html><body>{message}</body></html>".encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: text/html; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
 
 
 class AuthorizationFlow:
     """Drive OAuth authorization with minimal dependencies."""
 
-    def __init__(self, config: OAuthConfig, store: CredentialStore) -> None:
+    def __init__(self, config: OAuthConfig, store: CredentialStore, session: HTTPSession | None = None) -> None:
         self._config = config
         self._store = store
+        self._http = session or default_session()
+        self._refresh_lock = threading.Lock()
+        # Only ``state`` varies per authorization; encode the rest once.
+        fixed = urllib.parse.urlencode(
+            {
+                "client_id": config.client_id,
+                "redirect_uri": config.redirect_uri,
+                "response_type": "code",
+                "scope": config.scope,
+            }
+        )
+        self._authorization_prefix = f"{AUTHORIZATION_ENDPOINT}?{fixed}&state="
+
+    # ------------------------------------------------------------------
+    @property
+    def session(self) -> HTTPSession:
+        """Keep-alive session used for token requests, shareable with other clients."""
+
+        return self._http
 
     # ------------------------------------------------------------------
     def generate_state(self) -> str:
@@ -73,47 +108,59 @@ class AuthorizationFlow:
 
     # ------------------------------------------------------------------
     def build_authorization_url(self, state: str) -> str:
-        params = {
-            "client_id": self._config.client_id,
-            "redirect_uri": self._config.redirect_uri,
-            "response_type": "code",
-            "scope": self._config.scope,
-            "state": state,
-        }
-        query = urllib.parse.urlencode(params)
-        return f"{AUTHORIZATION_ENDPOINT}?{query}"
+        return self._authorization_prefix + urllib.parse.quote_plus(state)
 
     # ------------------------------------------------------------------
     def wait_for_callback(self, state: str, timeout: float = 300.0) -> AuthorizationResult:
-        event = threading.Event()
-        CallbackHandler.expected_state = state
-        CallbackHandler.event = event
-        server = HTTPServer((self._config.redirect_host, self._config.redirect_port), CallbackHandler)
-        thread = threading.Thread(target=server.handle_request, daemon=True)
-        thread.start()
-        finished = event.wait(timeout)
-        server.server_close()
-        if not finished or CallbackHandler.result is None:
-            raise TimeoutError("Authorization callback not received")
-        result = CallbackHandler.result
-        CallbackHandler.result = None
-        return result
+        try:
+            return asyncio.run(self._serve_callback(state, timeout))
+        except TimeoutError:
+            raise TimeoutError("Authorization callback not received") from None
+
+    # ------------------------------------------------------------------
+    async def _serve_callback(self, state: str, timeout: float) -> AuthorizationResult:
+        received: asyncio.Future[AuthorizationResult] = asyncio.get_running_loop().create_future()
+        handlers: Dict[asyncio.Task[None], asyncio.StreamWriter] = {}
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            task = asyncio.current_task()
+            handlers[task] = writer
+            try:
+                method, target = await asyncio.wait_for(_read_request_line(reader), CALLBACK_READ_TIMEOUT)
+                status, message, result = _resolve_callback(method, target, state)
+                if result is not None and not received.done():
+                    received.set_result(result)
+                writer.write(_render_response(status, message))
+                await writer.drain()
+            except (OSError, TimeoutError, ValueError):
+                pass
+            finally:
+                del handlers[task]
+                writer.close()
+
+        server = await asyncio.start_server(handle, self._config.redirect_host, self._config.redirect_port)
+        async with server:
+            try:
+                return await asyncio.wait_for(received, timeout)
+            finally:
+                # Browsers keep idle preconnect sockets open. Closing them makes
+                # the pending reads hit EOF so each handler returns on its own
+                # rather than being cancelled (and logged) by asyncio.run.
+                if handlers:
+                    for writer in handlers.values():
+                        writer.close()
+                    await asyncio.wait(list(handlers))
 
     # ------------------------------------------------------------------
     def exchange_code(self, result: AuthorizationResult) -> CredentialRecord:
-        payload = urllib.parse.urlencode(
+        data = self._request_token(
             {
                 "client_id": self._config.client_id,
                 "redirect_uri": self._config.redirect_uri,
                 "grant_type": "authorization_code",
                 "code": result.code,
             }
-        ).encode("utf-8")
-        request = urllib.request.Request(TOKEN_ENDPOINT, data=payload, method="POST")
-        request.add_header("Content-Type", "application/x-www-form-urlencoded")
-        with urllib.request.urlopen(request, timeout=30) as response:  # nosec: B310 - target controlled by user
-            content = response.read()
-        data: Dict[str, str] = json.loads(content.decode("utf-8"))
+        )
         expires_in = data.get("expires_in")
         expires_at = time.time() + float(expires_in) if expires_in else None
         record = CredentialRecord(
@@ -128,28 +175,114 @@ class AuthorizationFlow:
 
     # ------------------------------------------------------------------
     def refresh(self, record: CredentialRecord) -> CredentialRecord:
-        if not record.refresh_token:
-            raise RuntimeError("Refresh token missing; re-run authorization")
-        payload = urllib.parse.urlencode(
-            {
-                "client_id": self._config.client_id,
-                "redirect_uri": self._config.redirect_uri,
-                "grant_type": "refresh_token",
-                "refresh_token": record.refresh_token,
-            }
-        ).encode("utf-8")
-        request = urllib.request.Request(TOKEN_ENDPOINT, data=payload, method="POST")
-        request.add_header("Content-Type", "application/x-www-form-urlencoded")
-        with urllib.request.urlopen(request, timeout=30) as response:  # nosec: B310
-            content = response.read()
-        data: Dict[str, str] = json.loads(content.decode("utf-8"))
-        expires_in = data.get("expires_in")
-        record.access_token = data["access_token"]
-        record.refresh_token = data.get("refresh_token", record.refresh_token)
-        record.expires_at = time.time() + float(expires_in) if expires_in else None
-        record.scope = data.get("scope", record.scope)
-        self._store.save(record)
-        return record
+        """Refresh *record* and persist it; safe to call from several threads.
+
+        Concurrent callers (e.g. :class:`TokenRefresher` and an inline expiry
+        check) are serialised. A caller that lost the race gets the record the
+        winner stored instead of replaying a possibly rotated refresh token.
+        """
+
+        with self._refresh_lock:
+            current = self._store.load()
+            if current is not None and current.access_token != record.access_token and not current.is_expired:
+                return current
+            if not record.refresh_token:
+                raise RuntimeError("Refresh token missing; re-run authorization")
+            data = self._request_token(
+                {
+                    "client_id": self._config.client_id,
+                    "redirect_uri": self._config.redirect_uri,
+                    "grant_type": "refresh_token",
+                    "refresh_token": record.refresh_token,
+                }
+            )
+            expires_in = data.get("expires_in")
+            record.access_token = data["access_token"]
+            record.refresh_token = data.get("refresh_token", record.refresh_token)
+            record.expires_at = time.time() + float(expires_in) if expires_in else None
+            record.scope = data.get("scope", record.scope)
+            self._store.save(record)
+            return record
+
+    # ------------------------------------------------------------------
+    def _request_token(self, params: Dict[str, str]) -> Dict[str, str]:
+        payload = urllib.parse.urlencode(params).encode("utf-8")
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        response = self._http.post(TOKEN_ENDPOINT, payload, headers=headers, timeout=30)
+        return json.loads(response.body)
+
+
+class TokenRefresher:
+    """Refresh the stored access token in the background shortly before expiry.
+
+    The refreshed record is written back to the credential store, so a job that
+    loads credentials right before signing in finds a valid token and skips the
+    token endpoint round-trip. Callers should still check expiry inline as a
+    fallback for clock skew or a failed background refresh.
+    """
+
+    def __init__(
+        self,
+        flow: AuthorizationFlow,
+        store: CredentialStore,
+        record: CredentialRecord | None = None,
+        margin: float = REFRESH_MARGIN_SECONDS,
+        interval: float = REFRESH_CHECK_INTERVAL,
+    ) -> None:
+        self._flow = flow
+        self._store = store
+        self._record = record
+        self._margin = margin
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1)
+
+    # ------------------------------------------------------------------
+    def refresh_if_due(self) -> None:
+        if self._record is not None and not self._is_due(self._record):
+            return
+        # Re-read the store: another run may already have refreshed or re-authorized.
+        record = self._store.load()
+        self._record = record
+        if record is None or not record.refresh_token or not self._is_due(record):
+            return
+        LOGGER.info("Access token expires soon. Refreshing in background...")
+        self._record = self._flow.refresh(record)
+
+    # ------------------------------------------------------------------
+    def _is_due(self, record: CredentialRecord) -> bool:
+        if record.expires_at is None:
+            return False
+        return record.expires_at - time.time() < self._margin
+
+    # ------------------------------------------------------------------
+    def _run_loop(self) -> None:
+        delay = self._interval
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_if_due()
+                delay = self._interval
+            except Exception as exc:  # pragma: no cover - runtime safety
+                transient = isinstance(exc, OSError) or (isinstance(exc, HTTPError) and exc.status >= 500)
+                # A rejected refresh (e.g. a revoked token) will not heal by
+                # itself; back off instead of hitting the endpoint every tick.
+                delay = self._interval if transient else min(delay * 2, REFRESH_MAX_BACKOFF)
+                LOGGER.warning("Background token refresh failed: %s; retrying in %.0fs", exc, delay)
+            self._stop_event.wait(delay)
 
 
-__all__ = ["AuthorizationFlow", "AuthorizationResult"]
+__all__ = ["AuthorizationFlow", "AuthorizationResult", "TokenRefresher"]
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
@@ -17,9 +17,13 @@ class AppPaths:
     """Resolve application directories lazily."""
 
     base_dir: Path = Path.home() / ".anyrouter_auto"
+    _ensured: bool = field(default=False, init=False, repr=False, compare=False)
 
     def ensure(self) -> None:
+        if self._ensured:
+            return
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._ensured = True
 
     @property
     def credentials_file(self) -> Path:
@@ -28,6 +32,11 @@ class AppPaths:
 
     @property
     def schedule_file(self) -> Path:
+        self.ensure()
+        return self.base_dir / "schedule.bin"
+
+    @property
+    def legacy_schedule_file(self) -> Path:
         self.ensure()
         return self.base_dir / "schedule.json"
 
@@ -1,14 +1,26 @@
-"""Credential storage with lightweight XOR-based protection."""
+"""Credential storage with optional passphrase-based protection."""
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import hmac
 import json
+import os
+import secrets
+import tempfile
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
 from .config import AppPaths
 
+_DIGEST_SIZE = 32
+_MAGIC = b"ARA1"
+_KDF_SALT = b"anyrouter-auto/credentials"
+_NONCE_SIZE = 16
+_TAG_SIZE = 32
+
 
 @dataclass(slots=True)
 class CredentialRecord:
@@ -27,8 +39,16 @@ class CredentialRecord:
         return time.time() >= self.expires_at
 
     def to_payload(self) -> Dict[str, Any]:
-        payload = asdict(self)
-        return {k: v for k, v in payload.items() if v is not None}
+        payload: Dict[str, Any] = {"access_token": self.access_token}
+        if self.refresh_token is not None:
+            payload["refresh_token"] = self.refresh_token
+        if self.expires_at is not None:
+            payload["expires_at"] = self.expires_at
+        if self.scope is not None:
+            payload["scope"] = self.scope
+        if self.client_id is not None:
+            payload["client_id"] = self.client_id
+        return payload
 
     @classmethod
     def from_payload(cls, payload: Dict[str, Any]) -> "CredentialRecord":
@@ -42,19 +62,25 @@ class CredentialRecord:
 
 
 class CredentialStore:
-    """Store credentials on disk with optional passphrase obfuscation.
+    """Store credentials on disk with optional passphrase protection.
 
     The implementation intentionally avoids heavyweight dependencies. When the
-    ``passphrase`` argument is provided the JSON payload is XOR-masked with a key
-    derived from the passphrase. The mechanism is not intended to compete with
-    industry-grade encryption but merely to prevent accidental disclosure of the
-    token contents. Users should place stronger secrets into their OS keychain if
-    required.
+    ``passphrase`` argument is provided, keys are derived with
+    :func:`hashlib.scrypt` when the store is created (and shared by every store
+    using the same passphrase in the process); each save masks the JSON
+    payload with a SHAKE-256 keystream over a fresh random nonce and appends an
+    HMAC-SHA256 tag, so a wrong passphrase or a tampered file in this format is
+    detected on load. Any file without the format header is read with the older
+    XOR scheme, which has no integrity check, and is upgraded on the next save;
+    the tag therefore cannot detect a file whose header was stripped. Users
+    should place stronger secrets into their OS keychain if required.
     """
 
     def __init__(self, paths: Optional[AppPaths] = None, passphrase: str | None = None) -> None:
         self._paths = paths or AppPaths()
         self._passphrase = passphrase or ""
+        self._legacy_keystream = b""
+        self._keys = _derive_keys(self._passphrase) if self._passphrase else None
 
     # ------------------------------------------------------------------
     def load(self) -> Optional[CredentialRecord]:
@@ -73,7 +99,18 @@ class CredentialStore:
     def save(self, record: CredentialRecord) -> None:
         path = self._paths.credentials_file
         payload = json.dumps(record.to_payload(), indent=2, sort_keys=True)
-        path.write_bytes(self._encode(payload))
+        # Write a uniquely named sibling and swap it in so readers never see a
+        # torn file, even when another process saves at the same time.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(self._encode(payload))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
 
     # ------------------------------------------------------------------
     def clear(self) -> None:
@@ -86,24 +123,58 @@ class CredentialStore:
         buffer = text.encode("utf-8")
         if not self._passphrase:
             return buffer
-        key = _derive_key(self._passphrase, len(buffer))
-        return bytes(b ^ k for b, k in zip(buffer, key))
+        enc_key, mac_key = self._keys
+        nonce = secrets.token_bytes(_NONCE_SIZE)
+        keystream = hashlib.shake_256(enc_key + nonce).digest(len(buffer))
+        body = _MAGIC + nonce + _xor_bytes(buffer, keystream)
+        return body + hmac.digest(mac_key, body, "sha256")
 
     # ------------------------------------------------------------------
-    def _decode(self, data: bytes) -> str:
+    def _decode(self, data: bytes) -> bytes:
         if not self._passphrase:
-            return data.decode("utf-8")
-        key = _derive_key(self._passphrase, len(data))
-        buffer = bytes(b ^ k for b, k in zip(data, key))
-        return buffer.decode("utf-8")
-
+            return data
+        if not data.startswith(_MAGIC):
+            return _xor_bytes(data, self._legacy_key(len(data)))
+        enc_key, mac_key = self._keys
+        body, tag = data[:-_TAG_SIZE], data[-_TAG_SIZE:]
+        if not hmac.compare_digest(tag, hmac.digest(mac_key, body, "sha256")):
+            raise ValueError("Credential file failed integrity check; wrong passphrase?")
+        header = len(_MAGIC) + _NONCE_SIZE
+        nonce, masked = body[len(_MAGIC) : header], body[header:]
+        keystream = hashlib.shake_256(enc_key + nonce).digest(len(masked))
+        return _xor_bytes(masked, keystream)
 
-def _derive_key(passphrase: str, size: int) -> bytes:
-    # Simple derivation using repeated SHA256 digests.
-    import hashlib
-
-    digest = hashlib.sha256(passphrase.encode("utf-8")).digest()
-    key = bytearray()
+    # ------------------------------------------------------------------
+    def _legacy_key(self, size: int) -> bytes:
+        # Whole digests are cached so a longer request continues the chain.
+        if len(self._legacy_keystream) < size:
+            blocks = -(-size // _DIGEST_SIZE)
+            self._legacy_keystream = _derive_key(self._passphrase, blocks * _DIGEST_SIZE, self._legacy_keystream)
+        return self._legacy_keystream[:size]
+
+
+@functools.lru_cache(maxsize=4)
+def _derive_keys(passphrase: str) -> tuple[bytes, bytes]:
+    # scrypt is deliberately expensive; run it once per passphrase and process.
+    material = hashlib.scrypt(passphrase.encode("utf-8"), salt=_KDF_SALT, n=2**14, r=8, p=1, dklen=64)
+    return material[:32], material[32:]
+
+
+def _xor_bytes(data: bytes, key: bytes) -> bytes:
+    # XOR whole buffers as big integers; this runs in C instead of per byte.
+    size = len(data)
+    mixed = int.from_bytes(data, "big") ^ int.from_bytes(key[:size], "big")
+    return mixed.to_bytes(size, "big")
+
+
+def _derive_key(passphrase: str, size: int, prefix: bytes = b"") -> bytes:
+    # Legacy derivation using repeated SHA256 digests. A previously derived
+    # *prefix* (a whole number of digests) is extended instead of recomputed.
+    if prefix:
+        digest = hashlib.sha256(prefix[-_DIGEST_SIZE:]).digest()
+    else:
+        digest = hashlib.sha256(passphrase.encode("utf-8")).digest()
+    key = bytearray(prefix)
     while len(key) < size:
         key.extend(digest)
         digest = hashlib.sha256(digest).digest()
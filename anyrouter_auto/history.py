@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
+import atexit
 import csv
-import datetime as dt
+import time
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import IO, TYPE_CHECKING, Any, Iterable, List, Optional
 
 from .config import AppPaths
-from .signin import SignInResult
+
+if TYPE_CHECKING:  # pragma: no cover - annotation only, keeps `status` off the network stack
+    from .signin import SignInResult
+
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
 
 
 @dataclass(slots=True)
@@ -20,16 +26,30 @@ class HistoryRecord:
     message: str
 
     def summary(self) -> str:
-        when = dt.datetime.fromtimestamp(self.timestamp).isoformat()
+        when = time.strftime(_TIME_FORMAT, time.localtime(self.timestamp))
         reward = f" reward={self.reward}" if self.reward else ""
         return f"[{when}] {self.status.upper()} {self.message}{reward}".strip()
 
 
 class HistoryStore:
-    """Persist sign-in outcomes in CSV format."""
+    """Persist sign-in outcomes in CSV format.
+
+    The CSV file is opened lazily on the first :meth:`append` and kept open so
+    repeated appends skip the stat/open/close cycle. Rows are flushed as they
+    are written; call :meth:`close` (or use the store as a context manager) to
+    release the handle early, otherwise it is closed at interpreter exit.
+    """
 
     def __init__(self, paths: AppPaths | None = None) -> None:
         self._paths = paths or AppPaths()
+        self._handle: Optional[IO[str]] = None
+        self._writer: Any = None
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
     @property
     def csv_path(self) -> Path:
@@ -38,43 +58,62 @@ class HistoryStore:
 
     def append(self, result: SignInResult) -> None:
         record = HistoryRecord(
-            timestamp=result.timestamp,
+            timestamp=result.timestamp_ns / 1_000_000_000,
             status="success" if result.success else "failure",
             reward=result.reward or "",
             message=result.message,
         )
-        path = self.csv_path
-        is_new = not path.exists()
-        with path.open("a", newline="", encoding="utf-8") as handle:
-            writer = csv.writer(handle)
-            if is_new:
-                writer.writerow(["timestamp", "status", "reward", "message"])
-            writer.writerow([record.timestamp, record.status, record.reward, record.message])
+        if self._handle is None:
+            self._open()
+        self._writer.writerow([record.timestamp, record.status, record.reward, record.message])
+        self._handle.flush()
+
+    def close(self) -> None:
+        if self._handle is None:
+            return
+        atexit.unregister(self.close)
+        self._handle.close()
+        self._handle = None
+        self._writer = None
+
+    def _open(self) -> None:
+        handle = self.csv_path.open("a", newline="", encoding="utf-8")
+        self._handle = handle
+        self._writer = csv.writer(handle)
+        # Append mode positions at the end, so an empty file still needs its header.
+        if handle.tell() == 0:
+            self._writer.writerow(["timestamp", "status", "reward", "message"])
+        atexit.register(self.close)
 
     def load(self) -> List[HistoryRecord]:
+        return self.load_tail(0)
+
+    def load_tail(self, limit: int) -> List[HistoryRecord]:
+        """Return the last *limit* records; a non-positive *limit* returns all."""
+
         path = self.csv_path
         if not path.exists():
             return []
         with path.open("r", newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            items: List[HistoryRecord] = []
-            for row in reader:
-                items.append(
-                    HistoryRecord(
-                        timestamp=float(row["timestamp"]),
-                        status=row["status"],
-                        reward=row.get("reward", ""),
-                        message=row.get("message", ""),
-                    )
-                )
-        return items
+            reader = csv.reader(handle)
+            next(reader, None)
+            # csv.reader yields [] for blank lines, which DictReader used to skip.
+            rows = deque((row for row in reader if row), maxlen=limit if limit > 0 else None)
+        return [_record_from_row(row) for row in rows]
 
     def format(self, records: Iterable[HistoryRecord]) -> str:
         lines = ["timestamp,status,reward,message"]
         for item in records:
-            when = dt.datetime.fromtimestamp(item.timestamp).isoformat()
+            when = time.strftime(_TIME_FORMAT, time.localtime(item.timestamp))
             lines.append(f"{when},{item.status},{item.reward},{item.message}")
         return "\n".join(lines)
 
 
+def _record_from_row(row: List[str]) -> HistoryRecord:
+    if len(row) < 4:
+        row = row + [""] * (4 - len(row))
+    timestamp, status, reward, message = row[:4]
+    return HistoryRecord(timestamp=float(timestamp), status=status, reward=reward, message=message)
+
+
 __all__ = ["HistoryStore", "HistoryRecord"]
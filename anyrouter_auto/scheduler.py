@@ -2,43 +2,91 @@
 
 from __future__ import annotations
 
-import datetime as dt
 import json
 import logging
+import mmap
+import os
+import struct
+import tempfile
 import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
 from .config import AppPaths, ScheduleConfig
 
+if TYPE_CHECKING:  # pragma: no cover - annotation only
+    from .transport import HTTPSession
+
 LOGGER = logging.getLogger(__name__)
+WAKE_INTERVAL = 60.0
+
+_NS_PER_SECOND = 1_000_000_000
+_STATE_MAGIC = b"ARS2"
+# magic, hour, minute, has_last_run, last_run (epoch nanoseconds)
+_STATE_LAYOUT = struct.Struct("<4sBB?q")
 
 
 @dataclass(slots=True)
 class ScheduleState:
     hour: int
     minute: int
-    last_run: Optional[float] = None
+    last_run: Optional[int] = None  # epoch nanoseconds
 
     def to_payload(self) -> dict[str, int | float | None]:
-        return {"hour": self.hour, "minute": self.minute, "last_run": self.last_run}
+        # Same shape as the released schedule.json: last_run in float seconds.
+        last_run = self.last_run / _NS_PER_SECOND if self.last_run is not None else None
+        return {"hour": self.hour, "minute": self.minute, "last_run": last_run}
 
     @classmethod
     def from_payload(cls, payload: dict[str, int | float | None]) -> "ScheduleState":
-        return cls(hour=int(payload["hour"]), minute=int(payload["minute"]), last_run=payload.get("last_run"))
+        # JSON state from earlier releases recorded float seconds.
+        seconds = payload.get("last_run")
+        last_run = int(float(seconds) * _NS_PER_SECOND) if seconds is not None else None
+        return cls(hour=int(payload["hour"]), minute=int(payload["minute"]), last_run=last_run)
 
+    def to_bytes(self) -> bytes:
+        last_run = self.last_run
+        return _STATE_LAYOUT.pack(_STATE_MAGIC, self.hour, self.minute, last_run is not None, last_run or 0)
+
+    @classmethod
+    def from_bytes(cls, data: bytes | mmap.mmap) -> "ScheduleState":
+        if len(data) != _STATE_LAYOUT.size:
+            raise ValueError("Unexpected schedule state size")
+        magic, hour, minute, has_last_run, last_run = _STATE_LAYOUT.unpack_from(data)
+        if magic != _STATE_MAGIC:
+            raise ValueError("Unknown schedule state format")
+        return cls(hour=hour, minute=minute, last_run=last_run if has_last_run else None)
 
-class DailyScheduler:
-    """Run a callable at a fixed daily time."""
 
-    def __init__(self, callback: Callable[[], None], config: Optional[ScheduleConfig] = None, paths: Optional[AppPaths] = None) -> None:
+class DailyScheduler:
+    """Run a callable at a fixed daily time.
+
+    :meth:`run_forever` blocks the calling thread; call :meth:`stop` from
+    another thread or the callback itself to make it return. Do not call it
+    from a signal handler: it takes locks the interrupted code may hold. Let
+    the signal raise :exc:`KeyboardInterrupt` out of :meth:`run_forever`
+    instead, as the ``schedule`` command does.
+
+    When the callback talks to the network through *session*, :meth:`stop`
+    closes it, aborting in-flight requests instead of waiting for them to time
+    out; pass a session the callback owns, not one shared with other work.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[], None],
+        config: Optional[ScheduleConfig] = None,
+        paths: Optional[AppPaths] = None,
+        session: Optional[HTTPSession] = None,
+    ) -> None:
         self._callback = callback
         self._config = config or ScheduleConfig.from_env()
         self._paths = paths or AppPaths()
+        self._session = session
         self._stop_event = threading.Event()
-        self._thread: Optional[threading.Thread] = None
+        self._last_written: Optional[bytes] = None
 
     # ------------------------------------------------------------------
     def _state_file(self) -> Path:
@@ -46,54 +94,112 @@ class DailyScheduler:
 
     # ------------------------------------------------------------------
     def load_state(self) -> ScheduleState:
-        path = self._state_file()
-        if not path.exists():
-            return ScheduleState(hour=self._config.hour, minute=self._config.minute)
         try:
-            payload = json.loads(path.read_text(encoding="utf-8"))
-            return ScheduleState.from_payload(payload)
-        except Exception:  # pragma: no cover - defensive parsing
+            handle = self._state_file().open("rb")
+        except FileNotFoundError:
+            return self._migrate_legacy_state()
+        try:
+            # Decode straight from the page cache; unpack_from reads the map in place.
+            with handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                state = ScheduleState.from_bytes(view)
+        except Exception:  # pragma: no cover - defensive parsing (includes empty files)
             return ScheduleState(hour=self._config.hour, minute=self._config.minute)
+        self._last_written = state.to_bytes()
+        return state
 
     # ------------------------------------------------------------------
     def save_state(self, state: ScheduleState) -> None:
-        payload = json.dumps(state.to_payload(), indent=2)
-        self._state_file().write_text(payload, encoding="utf-8")
+        data = state.to_bytes()
+        if data == self._last_written:
+            return
+        path = self._state_file()
+        # Swap in a uniquely named sibling so a crash mid-write cannot truncate
+        # the state; losing the latest write is harmless, so skip the fsync.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._last_written = data
 
     # ------------------------------------------------------------------
-    def start(self) -> None:
-        if self._thread and self._thread.is_alive():
-            return
-        self._stop_event.clear()
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+    def _migrate_legacy_state(self) -> ScheduleState:
+        # One-shot upgrade from the JSON state file used by earlier releases.
+        legacy = self._paths.legacy_schedule_file
+        try:
+            state = ScheduleState.from_payload(json.loads(legacy.read_bytes()))
+        except FileNotFoundError:
+            return ScheduleState(hour=self._config.hour, minute=self._config.minute)
+        except Exception:  # pragma: no cover - defensive parsing
+            return ScheduleState(hour=self._config.hour, minute=self._config.minute)
+        self.save_state(state)
+        legacy.unlink()
+        return state
 
     # ------------------------------------------------------------------
     def stop(self) -> None:
         self._stop_event.set()
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=1)
+        if self._session is not None:
+            self._session.close()
 
     # ------------------------------------------------------------------
-    def _run_loop(self) -> None:
+    def run_forever(self) -> None:
+        self._stop_event.clear()
         state = self.load_state()
         LOGGER.info("Scheduler started for %02d:%02d", state.hour, state.minute)
         while not self._stop_event.is_set():
-            now = dt.datetime.now()
-            target = now.replace(hour=state.hour, minute=state.minute, second=0, microsecond=0)
-            if target <= now:
-                target = target + dt.timedelta(days=1)
-            wait_seconds = (target - now).total_seconds()
-            LOGGER.debug("Next run at %s (%.0f seconds)", target.isoformat(), wait_seconds)
-            finished = self._stop_event.wait(wait_seconds)
-            if finished:
+            now = time.time()
+            target = _next_run(state, now)
+            wait_seconds = target - now
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug("Next run at %s (%.0f seconds)", time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(target)), wait_seconds)
+            if not self._sleep_until(target, wait_seconds):
                 break
+            if time.time() < target:
+                # The wall clock moved backwards while we slept; recompute.
+                continue
             try:
                 self._callback()
-                state.last_run = time.time()
+                state.last_run = time.time_ns()
                 self.save_state(state)
             except Exception as exc:  # pragma: no cover - runtime safety
+                if self._stop_event.is_set():
+                    # stop() aborted the job's in-flight request; not a failure.
+                    break
                 LOGGER.exception("Scheduled job failed: %s", exc)
 
+    # ------------------------------------------------------------------
+    def _sleep_until(self, target: float, wait_seconds: float) -> bool:
+        """Wait for *target*; return ``False`` if the scheduler was stopped.
+
+        Sleeping in bounded chunks against a monotonic deadline lets the loop
+        notice suspend/resume (the monotonic clock pauses while suspended) and
+        wall-clock jumps within ``WAKE_INTERVAL`` instead of up to a day late.
+        """
+
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or time.time() >= target:
+                return True
+            if self._stop_event.wait(min(remaining, WAKE_INTERVAL)):
+                return False
+
+
+def _next_run(state: ScheduleState, now: float) -> float:
+    """Return the epoch time of the next local ``hour:minute`` after *now*."""
+
+    # mktime normalises the day overflow and applies the DST offset in effect
+    # on the target day, which a fixed seconds-since-midnight offset would not.
+    local = time.localtime(now)
+    fields = (local.tm_year, local.tm_mon, local.tm_mday, state.hour, state.minute, 0, 0, 0, -1)
+    target = time.mktime(fields)
+    if target <= now:
+        target = time.mktime(fields[:2] + (local.tm_mday + 1,) + fields[3:])
+    return target
+
 
 __all__ = ["DailyScheduler", "ScheduleState"]
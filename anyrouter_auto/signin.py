@@ -3,82 +3,152 @@
 from __future__ import annotations
 
 import datetime as dt
+import functools
 import json
 import logging
 import time
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
 
 from .credentials import CredentialRecord
+from .transport import HTTPSession, Retry, Timeout, default_session
 
 SIGNIN_ENDPOINT = "https://anyrouter.top/api/checkin"
 CSRF_ENDPOINT = "https://anyrouter.top/api/session"
 LOGGER = logging.getLogger(__name__)
+_NS_PER_SECOND = 1_000_000_000
 
 
-@dataclass(slots=True)
-class SignInResult:
+class SignInResult(NamedTuple):
+    """Immutable outcome of one sign-in attempt."""
+
     success: bool
     message: str
     reward: Optional[str]
-    timestamp: float
+    timestamp_ns: int
+
+
+@dataclass(slots=True)
+class _SignInResponse:
+    success: bool = False
+    message: str = ""
+    reward: Optional[str] = None
+    timestamp: Optional[float] = None
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "_SignInResponse":
+        if not isinstance(payload, dict):
+            raise ValueError("Unexpected sign-in response payload")
+        get = payload.get
+        return cls(success=bool(get("success")), message=get("message", ""), reward=get("reward"), timestamp=get("timestamp"))
+
+
+@dataclass(slots=True)
+class _CsrfResponse:
+    csrf_token: Optional[str] = None
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "_CsrfResponse":
+        if not isinstance(payload, dict):
+            raise ValueError("Unexpected session response payload")
+        return cls(csrf_token=payload.get("csrf_token"))
 
 
 class SignInClient:
     """Perform authenticated requests against AnyRouter."""
 
-    def __init__(self, user_agent: str | None = None) -> None:
+    _TIMEOUT_GET = Timeout(connect=3, read=10)
+    _TIMEOUT_POST = Timeout(connect=3, read=15)
+    # Applies to the idempotent CSRF fetch; the check-in POST is never replayed.
+    _RETRY = Retry(total=2, backoff_factor=0.2, status_forcelist=frozenset({429, 500, 502, 503, 504}))
+
+    def __init__(self, user_agent: str | None = None, session: HTTPSession | None = None) -> None:
         self._user_agent = user_agent or "anyrouter-auto/0.1"
+        self._http = session or default_session()
 
     # ------------------------------------------------------------------
-    def _build_request(self, url: str, token: str, method: str = "GET", data: Optional[Dict[str, str]] = None) -> urllib.request.Request:
-        encoded = None
-        if data:
-            encoded = json.dumps(data).encode("utf-8")
-        request = urllib.request.Request(url, data=encoded, method=method)
-        request.add_header("Authorization", f"Bearer {token}")
-        request.add_header("User-Agent", self._user_agent)
-        if data:
-            request.add_header("Content-Type", "application/json")
-        return request
+    def _headers_for(self, record: CredentialRecord, json_body: bool = False) -> Dict[str, str]:
+        return _auth_headers(record.access_token, self._user_agent, json_body)
 
     # ------------------------------------------------------------------
     def fetch_csrf_token(self, record: CredentialRecord) -> Optional[str]:
-        request = self._build_request(CSRF_ENDPOINT, record.access_token)
         try:
-            with urllib.request.urlopen(request, timeout=10) as response:  # nosec: B310
-                payload = json.loads(response.read().decode("utf-8"))
+            response = self._http.request(
+                "GET", CSRF_ENDPOINT, headers=self._headers_for(record), timeout=self._TIMEOUT_GET, retries=self._RETRY
+            )
+            session = _CsrfResponse.from_payload(json.loads(response.body))
         except Exception as exc:  # pragma: no cover - network heavy
             LOGGER.warning("Failed to refresh session metadata: %s", exc)
             return None
-        return payload.get("csrf_token")
+        return session.csrf_token
 
     # ------------------------------------------------------------------
     def perform_sign_in(self, record: CredentialRecord) -> SignInResult:
-        body = {"timestamp": int(time.time())}
-        request = self._build_request(SIGNIN_ENDPOINT, record.access_token, method="POST", data=body)
+        body = json.dumps({"timestamp": int(time.time())}, separators=(",", ":")).encode("utf-8")
+        headers = self._headers_for(record, json_body=True)
         try:
-            with urllib.request.urlopen(request, timeout=15) as response:  # nosec: B310
-                payload = json.loads(response.read().decode("utf-8"))
+            response = self._http.request(
+                "POST", SIGNIN_ENDPOINT, body=body, headers=headers, timeout=self._TIMEOUT_POST, retries=self._RETRY
+            )
+            reply = _SignInResponse.from_payload(json.loads(response.body))
         except Exception as exc:  # pragma: no cover - network heavy
             LOGGER.error("Sign-in request failed: %s", exc)
             raise
-        reward = payload.get("reward")
-        message = payload.get("message", "")
-        success = bool(payload.get("success", False))
-        timestamp = payload.get("timestamp")
-        if timestamp is None:
-            timestamp = time.time()
-        return SignInResult(success=success, message=message, reward=reward, timestamp=float(timestamp))
+        # A missing (or zero) server timestamp falls back to the local clock.
+        timestamp_ns = int(float(reply.timestamp or 0) * _NS_PER_SECOND) or time.time_ns()
+        return SignInResult(success=reply.success, message=reply.message, reward=reply.reward, timestamp_ns=timestamp_ns)
+
+    # ------------------------------------------------------------------
+    def sign_in_flow(self, record: CredentialRecord) -> SignInResult:
+        """Fetch the session metadata, then sign in.
+
+        Both requests target the same host, so the check-in POST reuses the
+        connection the session GET just left in the pool.
+        """
+
+        self.fetch_csrf_token(record)
+        return self.perform_sign_in(record)
+
+    # ------------------------------------------------------------------
+    def sign_in_all(self, records: Iterable[CredentialRecord], max_workers: int = 4) -> List[SignInResult]:
+        """Sign in every record, overlapping requests on the shared session.
+
+        Results keep the input order. A request that raises is reported as a
+        failed :class:`SignInResult` so one bad credential does not hide the
+        outcome of the others.
+        """
+
+        records = list(records)
+        if not records:
+            return []
+        workers = max(1, min(max_workers, len(records)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._sign_in_or_failure, records))
+
+    # ------------------------------------------------------------------
+    def _sign_in_or_failure(self, record: CredentialRecord) -> SignInResult:
+        try:
+            return self.perform_sign_in(record)
+        except Exception as exc:
+            return SignInResult(success=False, message=str(exc), reward=None, timestamp_ns=time.time_ns())
 
     # ------------------------------------------------------------------
     @staticmethod
     def format_result(result: SignInResult) -> str:
         status = "SUCCESS" if result.success else "FAILED"
-        when = dt.datetime.fromtimestamp(result.timestamp).isoformat()
+        when = dt.datetime.fromtimestamp(result.timestamp_ns / _NS_PER_SECOND).isoformat()
         reward = result.reward or ""
         return f"[{when}] {status} {result.message} {reward}".strip()
 
 
+@functools.lru_cache(maxsize=32)
+def _auth_headers(token: str, user_agent: str, json_body: bool) -> Dict[str, str]:
+    # The cached dict is shared between requests; treat it as read-only.
+    headers = {"Authorization": f"Bearer {token}", "User-Agent": user_agent}
+    if json_body:
+        headers["Content-Type"] = "application/json"
+    return headers
+
+
 __all__ = ["SignInClient", "SignInResult"]
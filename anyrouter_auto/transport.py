@@ -0,0 +1,287 @@
+"""Keep-alive HTTP transport shared by the OAuth and sign-in clients."""
+
+from __future__ import annotations
+
+import base64
+import http.client
+import select
+import socket
+import threading
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Mapping, Optional, Set, Tuple
+
+DEFAULT_POOL_MAXSIZE = 4
+# Idle sockets older than this are reconnected: NATs and middleboxes may have
+# dropped the mapping without telling either end.
+POOL_IDLE_TIMEOUT = 60.0
+
+# scheme, host, port, proxy URL (``None`` for a direct connection)
+_PoolKey = Tuple[str, str, Optional[int], Optional[str]]
+
+
+class HTTPError(RuntimeError):
+    """Raised when the remote endpoint answers with an error status."""
+
+    def __init__(self, url: str, status: int, reason: str, body: bytes) -> None:
+        super().__init__(f"HTTP {status} {reason} for {url}")
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+@dataclass(slots=True)
+class HTTPResponse:
+    status: int
+    reason: str
+    body: bytes
+
+
+@dataclass(frozen=True, slots=True)
+class Timeout:
+    """Separate limits for establishing the connection and reading the reply."""
+
+    connect: float
+    read: float
+
+
+@dataclass(frozen=True, slots=True)
+class Retry:
+    """Retry policy for transient failures; build once and share it."""
+
+    total: int = 0
+    backoff_factor: float = 0.0
+    status_forcelist: FrozenSet[int] = frozenset()
+    # Only idempotent methods are replayed, mirroring urllib3's default.
+    allowed_methods: FrozenSet[str] = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+    def backoff(self, attempt: int) -> float:
+        return self.backoff_factor * (2**attempt)
+
+
+_NO_RETRY = Retry()
+
+
+class HTTPSession:
+    """Pool persistent HTTP(S) connections per host.
+
+    :mod:`http.client` keeps the socket open between requests as long as the
+    server allows it, so handing the same connection to the next request skips
+    the TCP and TLS handshakes. Idle connections are parked per host (up to
+    ``pool_maxsize``) and a connection is never used by two threads at once.
+    Proxies are taken from the environment (``https_proxy``, ``http_proxy``,
+    ``no_proxy``) the same way :func:`urllib.request.urlopen` does; they are
+    looked up once per session and the route is cached per host.
+    """
+
+    def __init__(self, pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> None:
+        self._pool_maxsize = pool_maxsize
+        # Parked connections with the monotonic time they were released.
+        self._idle: Dict[_PoolKey, List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._active: Set[http.client.HTTPConnection] = set()
+        # Bumped by close(); requests started before it must not be replayed.
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._proxies = urllib.request.getproxies()
+        self._routes: Dict[Tuple[str, str], Optional[str]] = {}
+
+    # ------------------------------------------------------------------
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None = None,
+        headers: Mapping[str, str] | None = None,
+        timeout: float | Timeout = 30.0,
+        retries: Retry | None = None,
+    ) -> HTTPResponse:
+        parts = urllib.parse.urlsplit(url)
+        host = parts.hostname or ""
+        proxy = self._proxy_for(parts.scheme, host)
+        key: _PoolKey = (parts.scheme, host, parts.port, proxy)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        if proxy is not None and parts.scheme != "https":
+            # Plain HTTP goes to the proxy itself, which needs the absolute URL.
+            target = urllib.parse.urlunsplit((parts.scheme, parts.netloc, target, "", ""))
+            headers = {**(headers or {}), **_proxy_headers(proxy)}
+        limits = timeout if isinstance(timeout, Timeout) else Timeout(connect=timeout, read=timeout)
+        policy = retries if retries is not None and method in retries.allowed_methods else _NO_RETRY
+        generation = self._generation
+        attempt = 0
+        while True:
+            error: Exception
+            try:
+                status, reason, content = self._send(key, method, target, body, headers, limits)
+            except (OSError, http.client.HTTPException) as exc:
+                error = exc
+            else:
+                if status < 400:
+                    return HTTPResponse(status=status, reason=reason, body=content)
+                error = HTTPError(url, status, reason, content)
+                if status not in policy.status_forcelist:
+                    raise error
+            if attempt >= policy.total or self._generation != generation:
+                raise error
+            time.sleep(policy.backoff(attempt))
+            if self._generation != generation:
+                # close() ran during the backoff; do not replay on a new connection.
+                raise error
+            attempt += 1
+
+    # ------------------------------------------------------------------
+    def _send(
+        self,
+        key: _PoolKey,
+        method: str,
+        target: str,
+        body: bytes | None,
+        headers: Mapping[str, str] | None,
+        limits: Timeout,
+    ) -> Tuple[int, str, bytes]:
+        conn = self._acquire(key, limits.connect)
+        try:
+            # http.client only reads the mapping, so shared header dicts are safe.
+            conn.request(method, target, body=body, headers=headers or {})
+            if conn.sock is not None:
+                conn.sock.settimeout(limits.read)
+            response = conn.getresponse()
+            content = response.read()
+        except Exception:
+            self._discard(conn)
+            raise
+        if response.will_close:
+            self._discard(conn)
+        else:
+            self._release(key, conn)
+        return response.status, response.reason, content
+
+    # ------------------------------------------------------------------
+    def post(self, url: str, body: bytes, headers: Mapping[str, str] | None = None, timeout: float = 30.0) -> HTTPResponse:
+        return self.request("POST", url, body=body, headers=headers, timeout=timeout)
+
+    # ------------------------------------------------------------------
+    def close(self) -> None:
+        """Close idle connections and abort requests still in flight.
+
+        In-flight sockets are shut down rather than closed: that unblocks a
+        read pending in another thread, which then discards the connection.
+        Requests already running when this is called are not retried. The
+        session stays usable for requests issued afterwards.
+        """
+
+        with self._lock:
+            self._generation += 1
+            idle = [conn for conns in self._idle.values() for conn, _ in conns]
+            self._idle.clear()
+            active = list(self._active)
+        for conn in idle:
+            conn.close()
+        for conn in active:
+            sock = conn.sock
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    def _proxy_for(self, scheme: str, host: str) -> Optional[str]:
+        """Return the proxy URL for *scheme* and *host*, or ``None`` to connect directly."""
+
+        route = (scheme, host)
+        try:
+            return self._routes[route]
+        except KeyError:
+            pass
+        # proxy_bypass consults the system configuration on macOS and Windows.
+        proxy = self._proxies.get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            proxy = None
+        elif "://" not in proxy:
+            proxy = f"http://{proxy}"
+        self._routes[route] = proxy
+        return proxy
+
+    # ------------------------------------------------------------------
+    def _acquire(self, key: _PoolKey, timeout: float) -> http.client.HTTPConnection:
+        with self._lock:
+            conns = self._idle.get(key)
+            conn, released_at = conns.pop() if conns else (None, 0.0)
+        if conn is None:
+            scheme, host, port, proxy = key
+            factory = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            if proxy is None:
+                conn = factory(host, port, timeout=timeout)
+            else:
+                via = urllib.parse.urlsplit(proxy)
+                conn = factory(via.hostname, via.port or 80, timeout=timeout)
+                if scheme == "https":
+                    # CONNECT through the proxy; TLS is then negotiated with *host*.
+                    conn.set_tunnel(host, port, headers=_proxy_headers(proxy))
+        else:
+            stale = time.monotonic() - released_at > POOL_IDLE_TIMEOUT
+            if stale or conn.sock is None or _is_dropped(conn.sock):
+                # Closing lets http.client reconnect transparently on the next request.
+                conn.close()
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        with self._lock:
+            self._active.add(conn)
+        return conn
+
+    # ------------------------------------------------------------------
+    def _release(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._active.discard(conn)
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self._pool_maxsize:
+                conns.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    # ------------------------------------------------------------------
+    def _discard(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._active.discard(conn)
+        conn.close()
+
+
+def _proxy_headers(proxy: str) -> Dict[str, str]:
+    via = urllib.parse.urlsplit(proxy)
+    if via.username is None:
+        return {}
+    userpass = f"{urllib.parse.unquote(via.username)}:{urllib.parse.unquote(via.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(userpass.encode("utf-8")).decode("ascii")}
+
+
+def _is_dropped(sock: socket.socket) -> bool:
+    # An idle keep-alive socket only becomes readable once the peer closed it.
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+_default_session: Optional[HTTPSession] = None
+_default_lock = threading.Lock()
+
+
+def default_session() -> HTTPSession:
+    """Return the process-wide session used when callers do not supply one."""
+
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            _default_session = HTTPSession()
+        return _default_session
+
+
+__all__ = ["HTTPError", "HTTPResponse", "HTTPSession", "Retry", "Timeout", "default_session"]
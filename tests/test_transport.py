@@ -0,0 +1,98 @@
+"""Local-server checks for the pooled HTTP transport."""
+
+from __future__ import annotations
+
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from anyrouter_auto import transport
+from anyrouter_auto.transport import HTTPError, HTTPSession, Retry
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits: list[str] = []
+
+    def do_GET(self) -> None:
+        self._reply()
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply()
+
+    def _reply(self) -> None:
+        self.hits.append(f"{self.command} {self.path}")
+        if self.path.endswith("/unavailable"):
+            status, body = 503, b"busy"
+        else:
+            # Echo the client port so tests can tell whether a socket was reused.
+            status, body = 200, str(self.client_address[1]).encode("ascii")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def _session(**env: str) -> HTTPSession:
+    # Proxies are resolved when the session is created; pin the environment.
+    with mock.patch.dict(os.environ, env, clear=True):
+        return HTTPSession()
+
+
+class HTTPSessionTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        _Handler.hits = []
+        self.session = _session()
+        self.addCleanup(self.session.close)
+
+    def test_reuses_connection(self) -> None:
+        first = self.session.request("GET", f"{self.base}/port").body
+        second = self.session.request("GET", f"{self.base}/port").body
+        self.assertEqual(first, second)
+
+    def test_reconnects_after_idle_timeout(self) -> None:
+        first = self.session.request("GET", f"{self.base}/port").body
+        with mock.patch.object(transport, "POOL_IDLE_TIMEOUT", -1.0):
+            second = self.session.request("GET", f"{self.base}/port").body
+        self.assertNotEqual(first, second)
+
+    def test_retries_allowed_method(self) -> None:
+        policy = Retry(total=2, status_forcelist=frozenset({503}))
+        with self.assertRaises(HTTPError) as caught:
+            self.session.request("GET", f"{self.base}/unavailable", retries=policy)
+        self.assertEqual(caught.exception.status, 503)
+        self.assertEqual(len(_Handler.hits), 3)
+
+    def test_does_not_retry_other_methods(self) -> None:
+        policy = Retry(total=2, status_forcelist=frozenset({503}))
+        with self.assertRaises(HTTPError):
+            self.session.request("POST", f"{self.base}/unavailable", body=b"{}", retries=policy)
+        self.assertEqual(_Handler.hits, ["POST /unavailable"])
+
+    def test_sends_absolute_target_through_http_proxy(self) -> None:
+        session = _session(http_proxy=self.base)
+        self.addCleanup(session.close)
+        session.request("GET", "http://anyrouter.invalid/probe?x=1")
+        self.assertEqual(_Handler.hits, ["GET http://anyrouter.invalid/probe?x=1"])
+
+
+if __name__ == "__main__":
+    unittest.main()